@@ -5,13 +5,32 @@ Flask application providing UI for monitoring and viewing pipeline data
 import os
 import sys
 import json
+import functools
 import pandas as pd
-from datetime import datetime
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from datetime import datetime, timezone
 from pathlib import Path
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response
+import threading
 from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import time
-import subprocess
+import io
+import runpy
+import traceback
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -21,7 +40,275 @@ from pipeline import WeatherPipeline
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 
-# Global variables for pipeline status
+# Data store paths - Parquet is the canonical store (columnar, typed, compressed),
+# CSV is kept as a fallback for data written by older pipeline runs
+CSV_PATH = './data/weather_data.csv'
+PARQUET_PATH = './data/weather_data.parquet'
+STATS_PATH = './data/stats.json'
+
+
+def weather_data_exists():
+    """Check whether any weather data store is available"""
+    return os.path.exists(PARQUET_PATH) or os.path.exists(CSV_PATH)
+
+
+# Explicit dtypes for the CSV fallback reader - skips per-column type
+# inference and keeps the numeric columns in compact float32
+CSV_DTYPES = {
+    'city': 'string',
+    'country': 'string',
+    'weather_main': 'string',
+    'weather_description': 'string',
+    'extracted_at': 'string',
+    'temperature': 'float32',
+    'feels_like': 'float32',
+    'humidity': 'float32',
+    'pressure': 'float32',
+    'wind_speed': 'float32',
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _read_weather_frame(path, mtime, columns):
+    """
+    Read the data store from disk, memoized per (path, mtime, columns).
+    The mtime key makes the cache self-invalidating: a pipeline run
+    rewrites the file, the mtime changes and the next read misses.
+    """
+    columns = list(columns) if columns is not None else None
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+
+    # Arrow's multithreaded CSV reader instead of pandas' parser
+    convert_options = pacsv.ConvertOptions(
+        include_columns=columns,
+        column_types={col: pa.float32() if dtype == 'float32' else pa.string()
+                      for col, dtype in CSV_DTYPES.items()}
+    )
+    return pacsv.read_csv(path, convert_options=convert_options).to_pandas()
+
+
+def load_weather_data(columns=None):
+    """
+    Load weather data, preferring the Parquet store over CSV. Served
+    from an in-process mtime-guarded cache, so repeated requests
+    between pipeline runs don't touch disk at all.
+
+    Args:
+        columns: Optional list of columns to read (Parquet reads only
+                 the requested column chunks instead of parsing every row)
+
+    Returns:
+        DataFrame with the requested columns (shared cached object -
+        callers must not mutate it in place)
+    """
+    path = PARQUET_PATH if os.path.exists(PARQUET_PATH) else CSV_PATH
+    key_columns = tuple(columns) if columns is not None else None
+    return _read_weather_frame(path, os.path.getmtime(path), key_columns)
+
+
+# Cache-aside layer for the read-only dashboard endpoints. The underlying
+# data only changes when the pipeline runs, so responses are cached in Redis
+# with a TTL, keyed by the data-store freshness token (ETag): any writer -
+# dashboard-triggered, scheduler or CLI - moves the token, and entries for
+# the old snapshot are simply never read again and age out with the TTL. If
+# Redis is not reachable, the cache degrades to a no-op and endpoints
+# compute directly.
+CACHE_TTL_SECONDS = 300
+CACHE_KEY_DATA = 'dashboard:v1:data'
+CACHE_KEY_STATS = 'dashboard:v1:stats'
+CACHE_KEY_LATEST = 'dashboard:v1:latest'
+CACHE_KEY_BOOTSTRAP = 'dashboard:v1:bootstrap'
+
+
+def _init_redis():
+    """Connect to Redis if available, otherwise run without a cache"""
+    if redis is None:
+        return None
+    try:
+        client = redis.Redis(
+            host=os.getenv('REDIS_HOST', 'localhost'),
+            port=int(os.getenv('REDIS_PORT', 6379)),
+            socket_connect_timeout=1,
+            socket_timeout=1
+        )
+        client.ping()
+        return client
+    except Exception:
+        return None
+
+
+redis_client = _init_redis()
+
+
+def cache_get(key):
+    """Get a cached response body, or None on miss/unavailable cache"""
+    if redis_client is None:
+        return None
+    try:
+        return redis_client.get(key)
+    except Exception:
+        return None
+
+
+def cache_set(key, body, ttl=CACHE_TTL_SECONDS):
+    """Store a response body with a TTL; silently skip if cache is down"""
+    if redis_client is None:
+        return
+    try:
+        redis_client.set(key, body, ex=ttl)
+    except Exception:
+        pass
+
+
+def cache_acquire_lock(key):
+    """Try to take a short recompute lock to prevent cache stampedes"""
+    if redis_client is None:
+        return True
+    try:
+        return bool(redis_client.set(f'{key}:lock', '1', nx=True, ex=5))
+    except Exception:
+        return True
+
+
+def data_store_freshness():
+    """
+    Derive an ETag and Last-Modified timestamp from the data file, so
+    polling clients can revalidate with a 304 instead of re-downloading
+    unchanged payloads.
+    """
+    path = PARQUET_PATH if os.path.exists(PARQUET_PATH) else CSV_PATH
+    stat = os.stat(path)
+    etag = f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+    last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+    return etag, last_modified
+
+
+def dump_json(payload):
+    """
+    Serialize a response payload to JSON bytes, using orjson (C
+    implementation, handles numpy scalars natively) when available.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload)
+
+
+def cached_json_response(key, build_payload):
+    """
+    Cache-aside wrapper: serve the response body from Redis on a hit,
+    otherwise compute it, populate the cache and return it.
+
+    Args:
+        key: Cache key for this endpoint
+        build_payload: Zero-argument callable returning the response dict
+
+    Returns:
+        Flask Response with an application/json body
+    """
+    etag, last_modified = data_store_freshness()
+
+    # The key carries the freshness token, so a body cached before an
+    # external pipeline run (scheduler, CLI) can never be served under
+    # the newer ETag - the ETag a client revalidates against always
+    # matches the snapshot its body was built from
+    versioned_key = f'{key}:{etag}'
+
+    cached = cache_get(versioned_key)
+    if cached is None:
+        # On a miss, only one worker recomputes; the others briefly wait
+        # and re-check the cache before falling through to compute
+        if not cache_acquire_lock(versioned_key):
+            time.sleep(0.05)
+            cached = cache_get(versioned_key)
+
+    if cached is None:
+        cached = dump_json(build_payload())
+        cache_set(versioned_key, cached)
+
+    response = Response(cached, mimetype='application/json')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Turns the response into a 304 when If-None-Match / If-Modified-Since
+    # show the client copy is still current
+    return response.make_conditional(request)
+
+
+def write_stats_sidecar():
+    """
+    Compute summary statistics once at pipeline completion and persist
+    them to a small JSON sidecar, so the request handlers can serve a
+    file read instead of re-aggregating the full dataset per request.
+    """
+    df = load_weather_data(columns=['city', 'country', 'temperature',
+                                    'humidity', 'extracted_at'])
+
+    stats = {
+        'total_records': int(len(df)),
+        'cities': [str(city) for city in df['city'].unique().tolist()] if 'city' in df.columns else [],
+        'cities_count': int(df['city'].nunique()) if 'city' in df.columns else 0,
+        'countries_count': int(df['country'].nunique()) if 'country' in df.columns else 0,
+        'last_update': str(df['extracted_at'].max()) if 'extracted_at' in df.columns else 'Unknown',
+        'avg_temperature': round(float(df['temperature'].mean()), 1) if 'temperature' in df.columns else 0,
+        'avg_humidity': round(float(df['humidity'].mean()), 1) if 'humidity' in df.columns else 0
+    }
+
+    if 'temperature' in df.columns:
+        stats['temperature'] = {
+            'avg': round(float(df['temperature'].mean()), 1),
+            'min': round(float(df['temperature'].min()), 1),
+            'max': round(float(df['temperature'].max()), 1)
+        }
+
+    if 'humidity' in df.columns:
+        stats['humidity'] = {
+            'avg': round(float(df['humidity'].mean()), 1),
+            'min': round(float(df['humidity'].min()), 1),
+            'max': round(float(df['humidity'].max()), 1)
+        }
+
+    with open(STATS_PATH, 'w') as f:
+        json.dump(stats, f)
+
+
+@functools.lru_cache(maxsize=4)
+def _read_stats_sidecar(mtime):
+    """Load the stats sidecar, memoized on its modification time"""
+    with open(STATS_PATH, 'r') as f:
+        return json.load(f)
+
+
+def load_stats_sidecar():
+    """
+    Return precomputed stats, or None when there is no data yet.
+
+    Pipeline runs outside the dashboard (scheduler, CLI) update the
+    data store without touching the sidecar, so a sidecar older than
+    the store is stale and gets rebuilt here before serving.
+    """
+    if not weather_data_exists():
+        return None
+
+    data_path = PARQUET_PATH if os.path.exists(PARQUET_PATH) else CSV_PATH
+    if (not os.path.exists(STATS_PATH)
+            or os.path.getmtime(STATS_PATH) < os.path.getmtime(data_path)):
+        try:
+            write_stats_sidecar()
+        except Exception:
+            return None
+
+    return _read_stats_sidecar(os.path.getmtime(STATS_PATH))
+
+
+# Pipeline status lives in a Redis hash so every worker process sees the
+# same state; the local dict is the fallback when Redis is unavailable
+# (correct only for a single worker)
+STATUS_KEY = 'dashboard:v1:pipeline_status'
+RUN_LOCK_KEY = 'dashboard:v1:pipeline_run_lock'
+# Safety valve: the lock expires on its own if the worker holding it dies
+# before the finally block releases it
+RUN_LOCK_TTL_SECONDS = 600
+
 pipeline_status = {
     'status': 'idle',  # idle, running, success, error
     'last_run': None,
@@ -30,33 +317,94 @@ pipeline_status = {
 }
 
 
+def get_pipeline_status():
+    """Read the current pipeline status from the shared Redis hash"""
+    if redis_client is not None:
+        try:
+            stored = redis_client.hgetall(STATUS_KEY)
+            if stored:
+                status = {key.decode(): value.decode() for key, value in stored.items()}
+                status['records_processed'] = int(status.get('records_processed', 0))
+                if not status.get('last_run'):
+                    status['last_run'] = None
+                return status
+        except Exception:
+            pass
+    return dict(pipeline_status)
+
+
+def set_pipeline_status(**fields):
+    """Update the pipeline status locally and in the shared Redis hash"""
+    pipeline_status.update(fields)
+    if redis_client is not None:
+        try:
+            redis_client.hset(STATUS_KEY, mapping={
+                key: ('' if value is None else str(value))
+                for key, value in fields.items()
+            })
+        except Exception:
+            pass
+
+
+def acquire_run_lock():
+    """
+    Atomically claim the cross-worker run lock with SET NX. Without
+    Redis the status check in /api/run is the only guard (correct for a
+    single worker).
+    """
+    if redis_client is None:
+        return True
+    try:
+        return bool(redis_client.set(RUN_LOCK_KEY, '1', nx=True,
+                                     ex=RUN_LOCK_TTL_SECONDS))
+    except Exception:
+        return True
+
+
+def release_run_lock():
+    """Release the run lock so the next trigger can start a pipeline"""
+    if redis_client is None:
+        return
+    try:
+        redis_client.delete(RUN_LOCK_KEY)
+    except Exception:
+        pass
+
+
 def run_pipeline_async(cities=None):
     """Run pipeline in background thread"""
-    global pipeline_status
     try:
-        pipeline_status['status'] = 'running'
-        pipeline_status['message'] = 'Pipeline is running...'
-        
+        set_pipeline_status(status='running', message='Pipeline is running...')
+
         pipeline = WeatherPipeline()
         success = pipeline.run(cities)
-        
+
         if success:
-            pipeline_status['status'] = 'success'
-            pipeline_status['message'] = 'Pipeline completed successfully'
-            pipeline_status['last_run'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Count records
-            csv_path = './data/weather_data.csv'
-            if os.path.exists(csv_path):
-                df = pd.read_csv(csv_path)
-                pipeline_status['records_processed'] = len(df)
+            set_pipeline_status(
+                status='success',
+                message='Pipeline completed successfully',
+                last_run=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            )
+
+            # The pipeline already knows how many records it wrote -
+            # no need to re-read the data store just to count rows
+            set_pipeline_status(records_processed=pipeline.last_record_count)
+
+            if weather_data_exists():
+                # Precompute summary stats off the request path
+                write_stats_sidecar()
+
+            # No cache invalidation needed: the data file's freshness
+            # token moved, so cached bodies for the old snapshot are
+            # unreachable and expire with their TTL
         else:
-            pipeline_status['status'] = 'error'
-            pipeline_status['message'] = 'Pipeline failed - check logs'
-            
+            set_pipeline_status(status='error', message='Pipeline failed - check logs')
+
     except Exception as e:
-        pipeline_status['status'] = 'error'
-        pipeline_status['message'] = f'Error: {str(e)}'
+        set_pipeline_status(status='error', message=f'Error: {str(e)}')
+
+    finally:
+        release_run_lock()
 
 
 @app.route('/')
@@ -68,28 +416,38 @@ def index():
 @app.route('/api/status')
 def get_status():
     """Get current pipeline status"""
-    return jsonify(pipeline_status)
+    return jsonify(get_pipeline_status())
 
 
 @app.route('/api/run', methods=['POST'])
 def run_pipeline():
     """Trigger pipeline execution"""
-    global pipeline_status
-    
+    status = get_pipeline_status()
+
     # Reset status if it's stuck in error state
-    if pipeline_status['status'] == 'error':
-        pipeline_status['status'] = 'idle'
-    
-    if pipeline_status['status'] == 'running':
+    if status['status'] == 'error':
+        set_pipeline_status(status='idle')
+        status['status'] = 'idle'
+
+    if status['status'] == 'running':
         return jsonify({
             'success': False,
             'message': 'Pipeline is already running'
         }), 400
     
+    # The status read above is not atomic across gunicorn workers: two
+    # simultaneous POSTs can both see 'idle'. Only the worker that wins
+    # the SET NX lock may spawn; the run releases it when it finishes
+    if not acquire_run_lock():
+        return jsonify({
+            'success': False,
+            'message': 'Pipeline is already running'
+        }), 400
+
     # Get cities from request or use defaults
     data = request.get_json(silent=True) or {}
     cities = data.get('cities', None)
-    
+
     # Run pipeline in background thread
     thread = Thread(target=run_pipeline_async, args=(cities,))
     thread.daemon = True
@@ -101,41 +459,81 @@ def run_pipeline():
     })
 
 
+def build_data_payload():
+    """Build the /api/data response payload"""
+    # Read only the columns the dashboard needs
+    df = load_weather_data(columns=['city', 'country', 'temperature',
+                                    'humidity', 'extracted_at'])
+
+    # Convert to records - text NaNs are already written out as empty
+    # strings by the loader, so no per-request cleanup is needed
+    records = df.to_dict('records')
+
+    # Serve the precomputed summary when the sidecar exists,
+    # recompute only as a fallback
+    sidecar = load_stats_sidecar()
+    if sidecar is not None:
+        summary = {
+            'total_records': sidecar['total_records'],
+            'cities': sidecar['cities_count'],
+            'last_update': sidecar['last_update'],
+            'avg_temperature': sidecar['avg_temperature'],
+            'avg_humidity': sidecar['avg_humidity']
+        }
+    else:
+        # Get summary statistics (convert numpy types to Python types)
+        summary = {
+            'total_records': int(len(df)),
+            'cities': int(df['city'].nunique()) if 'city' in df.columns else 0,
+            'last_update': str(df['extracted_at'].max()) if 'extracted_at' in df.columns else 'Unknown',
+            'avg_temperature': round(float(df['temperature'].mean()), 1) if 'temperature' in df.columns else 0,
+            'avg_humidity': round(float(df['humidity'].mean()), 1) if 'humidity' in df.columns else 0
+        }
+
+    return {
+        'success': True,
+        'data': records,
+        'summary': summary
+    }
+
+
+def arrow_data_response():
+    """
+    Return the weather data as an Arrow IPC stream. Column-oriented and
+    zero-parse on the client side - far smaller and cheaper to produce
+    than row-wise JSON records for bulk consumers.
+    """
+    columns = ['city', 'country', 'temperature', 'humidity', 'extracted_at']
+    if os.path.exists(PARQUET_PATH):
+        tbl = pq.read_table(PARQUET_PATH, columns=columns)
+    else:
+        tbl = pa.Table.from_pandas(load_weather_data(columns=columns),
+                                   preserve_index=False)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tbl.schema) as writer:
+        writer.write_table(tbl)
+
+    return Response(sink.getvalue().to_pybytes(),
+                    mimetype='application/vnd.apache.arrow.stream')
+
+
 @app.route('/api/data')
 def get_data():
     """Get latest weather data"""
     try:
-        csv_path = './data/weather_data.csv'
-        
-        if not os.path.exists(csv_path):
+        if not weather_data_exists():
             return jsonify({
                 'success': False,
                 'message': 'No data available. Run the pipeline first.'
             }), 404
-        
-        # Read CSV data
-        df = pd.read_csv(csv_path)
-        
-        # Convert to records (convert numpy types to Python types)
-        # Replace NaN with None for proper JSON serialization
-        df = df.fillna('')  # Replace NaN with empty string
-        records = df.to_dict('records')
-        
-        # Get summary statistics (convert numpy types to Python types)
-        summary = {
-            'total_records': int(len(df)),
-            'cities': int(df['city'].nunique()) if 'city' in df.columns else 0,
-            'last_update': str(df['extracted_at'].max()) if 'extracted_at' in df.columns else 'Unknown',
-            'avg_temperature': float(round(df['temperature'].mean(), 1)) if 'temperature' in df.columns else 0,
-            'avg_humidity': float(round(df['humidity'].mean(), 1)) if 'humidity' in df.columns else 0
-        }
-        
-        return jsonify({
-            'success': True,
-            'data': records,
-            'summary': summary
-        })
-        
+
+        # Bulk consumers can request the columnar Arrow representation
+        if request.args.get('format') == 'arrow':
+            return arrow_data_response()
+
+        return cached_json_response(CACHE_KEY_DATA, build_data_payload)
+
     except Exception as e:
         return jsonify({
             'success': False,
@@ -143,37 +541,134 @@ def get_data():
         }), 500
 
 
+def build_latest_payload():
+    """Build the /api/data/latest response payload"""
+    # Only the columns rendered on the weather cards
+    columns = ['city', 'country', 'temperature', 'feels_like', 'humidity',
+               'pressure', 'wind_speed', 'weather_description', 'extracted_at']
+
+    if os.path.exists(PARQUET_PATH):
+        # Single-pass Arrow aggregation: per-city max timestamp, then an
+        # inner join back to pick the matching rows - no full sort and no
+        # datetime parsing of rows that won't be returned
+        tbl = pq.read_table(PARQUET_PATH, columns=columns)
+        latest = tbl.group_by('city').aggregate([('extracted_at', 'max')])
+        latest = latest.rename_columns(['city', 'extracted_at'])
+        joined = tbl.join(latest, keys=['city', 'extracted_at'], join_type='inner')
+        # Replace None with empty string for proper JSON serialization
+        records = [{key: ('' if value is None else value) for key, value in row.items()}
+                   for row in joined.to_pylist()]
+        return {
+            'success': True,
+            'data': records
+        }
+
+    df = load_weather_data(columns=columns)
+
+    # Get latest record for each city
+    if 'extracted_at' in df.columns and 'city' in df.columns:
+        # Argmax per city instead of sorting the whole frame; text NaNs
+        # are already cleaned at write time by the loader
+        idx = pd.to_datetime(df['extracted_at']).groupby(df['city']).idxmax()
+        records = df.loc[idx].to_dict('records')
+    else:
+        records = df.to_dict('records')
+
+    return {
+        'success': True,
+        'data': records
+    }
+
+
 @app.route('/api/data/latest')
 def get_latest_data():
     """Get only the latest data for each city"""
     try:
-        csv_path = './data/weather_data.csv'
-        
-        if not os.path.exists(csv_path):
+        if not weather_data_exists():
             return jsonify({
                 'success': False,
                 'message': 'No data available'
             }), 404
-        
-        df = pd.read_csv(csv_path)
-        
-        # Get latest record for each city
-        if 'extracted_at' in df.columns and 'city' in df.columns:
-            df['extracted_at'] = pd.to_datetime(df['extracted_at'])
-            latest_df = df.sort_values('extracted_at').groupby('city').tail(1)
-            # Replace NaN with empty string for proper JSON serialization
-            latest_df = latest_df.fillna('')
-            records = latest_df.to_dict('records')
-        else:
-            # Replace NaN with empty string for proper JSON serialization
-            df = df.fillna('')
-            records = df.to_dict('records')
-        
+
+        return cached_json_response(CACHE_KEY_LATEST, build_latest_payload)
+
+    except Exception as e:
         return jsonify({
-            'success': True,
-            'data': records
-        })
-        
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+
+# Newest-log discovery is cached briefly so dashboard polls don't
+# re-scan the log directory on every request
+LOG_DISCOVERY_TTL_SECONDS = 30
+_log_path_cache = {'path': None, 'checked_at': 0.0}
+
+
+def find_latest_log():
+    """
+    Locate the newest log file, preferring today's file and falling
+    back to a directory scan. The result is cached for a short TTL.
+
+    Returns:
+        Path to the most recent log file, or None if there is none
+    """
+    now = time.monotonic()
+    cached_path = _log_path_cache['path']
+    if (cached_path
+            and now - _log_path_cache['checked_at'] < LOG_DISCOVERY_TTL_SECONDS
+            and os.path.exists(cached_path)):
+        return cached_path
+
+    # Look for today's log file first
+    today = datetime.now().strftime('%Y%m%d')
+    log_path = f'./logs/weather_pipeline_{today}.log'
+
+    # If today's log doesn't exist, try to find the most recent one
+    if not os.path.exists(log_path):
+        log_path = None
+        log_dir = './logs'
+        if os.path.exists(log_dir):
+            log_files = [f for f in os.listdir(log_dir) if f.endswith('.log')]
+            if log_files:
+                # Get the most recent log file (names are date-stamped)
+                log_files.sort(reverse=True)
+                log_path = os.path.join(log_dir, log_files[0])
+
+    _log_path_cache['path'] = log_path
+    _log_path_cache['checked_at'] = now
+    return log_path
+
+
+def build_bootstrap_payload():
+    """Build the combined /api/bootstrap response payload"""
+    data = build_data_payload()
+    stats = build_stats_payload()
+    latest = build_latest_payload()
+    return {
+        'success': True,
+        'data': data['data'],
+        'summary': data['summary'],
+        'stats': stats['stats'],
+        'latest': latest['data']
+    }
+
+
+@app.route('/api/bootstrap')
+def get_bootstrap():
+    """
+    Return data, summary, stats and latest-per-city in one response,
+    so the dashboard loads with a single round-trip instead of three.
+    """
+    try:
+        if not weather_data_exists():
+            return jsonify({
+                'success': False,
+                'message': 'No data available. Run the pipeline first.'
+            }), 404
+
+        return cached_json_response(CACHE_KEY_BOOTSTRAP, build_bootstrap_payload)
+
     except Exception as e:
         return jsonify({
             'success': False,
@@ -181,38 +676,48 @@ def get_latest_data():
         }), 500
 
 
+def tail_lines(file_path, line_count=100):
+    """
+    Read the last lines of a file by seeking backward from the end in
+    8KB chunks, so I/O stays bounded no matter how large the log grows.
+
+    Args:
+        file_path: Path to the file
+        line_count: Number of trailing lines to return
+
+    Returns:
+        List of the last lines (with line endings preserved)
+    """
+    chunks = []
+    newlines = 0
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        while newlines <= line_count and position > 0:
+            step = min(8192, position)
+            position -= step
+            f.seek(position)
+            buf = f.read(step)
+            newlines += buf.count(b'\n')
+            chunks.append(buf)
+    text = b''.join(reversed(chunks)).decode('utf-8', errors='replace')
+    return text.splitlines(keepends=True)[-line_count:]
+
+
 @app.route('/api/logs')
 def get_logs():
     """Get recent log entries"""
     try:
-        # Look for today's log file first
-        today = datetime.now().strftime('%Y%m%d')
-        log_path = f'./logs/weather_pipeline_{today}.log'
-        
-        # If today's log doesn't exist, try to find the most recent one
-        if not os.path.exists(log_path):
-            log_dir = './logs'
-            if os.path.exists(log_dir):
-                log_files = [f for f in os.listdir(log_dir) if f.endswith('.log')]
-                if log_files:
-                    # Get the most recent log file
-                    log_files.sort(reverse=True)
-                    log_path = os.path.join(log_dir, log_files[0])
-                else:
-                    return jsonify({
-                        'success': True,
-                        'logs': []
-                    })
-            else:
-                return jsonify({
-                    'success': True,
-                    'logs': []
-                })
-        
-        # Read last 100 lines
-        with open(log_path, 'r') as f:
-            lines = f.readlines()
-            recent_logs = lines[-100:] if len(lines) > 100 else lines
+        log_path = find_latest_log()
+
+        if not log_path:
+            return jsonify({
+                'success': True,
+                'logs': []
+            })
+
+        # Read last 100 lines without loading the whole file
+        recent_logs = tail_lines(log_path, 100)
         
         return jsonify({
             'success': True,
@@ -226,52 +731,67 @@ def get_logs():
         }), 500
 
 
+def build_stats_payload():
+    """Build the /api/stats response payload"""
+    # Serve the precomputed sidecar when available
+    sidecar = load_stats_sidecar()
+    if sidecar is not None:
+        stats = {key: value for key, value in sidecar.items()
+                 if key not in ('last_update', 'avg_temperature', 'avg_humidity')}
+        return {
+            'success': True,
+            'stats': stats
+        }
+
+    # Fallback: recompute from the columns the stats need
+    df = load_weather_data(columns=['city', 'country', 'temperature',
+                                    'humidity'])
+
+    # Convert all numpy types to Python native types for JSON serialization
+    stats = {
+        'total_records': int(len(df)),
+        'cities_count': int(df['city'].nunique()) if 'city' in df.columns else 0,
+        'countries_count': int(df['country'].nunique()) if 'country' in df.columns else 0,
+    }
+
+    # Temperature stats
+    if 'temperature' in df.columns:
+        stats['temperature'] = {
+            'avg': round(float(df['temperature'].mean()), 1),
+            'min': round(float(df['temperature'].min()), 1),
+            'max': round(float(df['temperature'].max()), 1)
+        }
+
+    # Humidity stats
+    if 'humidity' in df.columns:
+        stats['humidity'] = {
+            'avg': round(float(df['humidity'].mean()), 1),
+            'min': round(float(df['humidity'].min()), 1),
+            'max': round(float(df['humidity'].max()), 1)
+        }
+
+    # Cities list
+    if 'city' in df.columns:
+        stats['cities'] = [str(city) for city in df['city'].unique().tolist()]
+
+    return {
+        'success': True,
+        'stats': stats
+    }
+
+
 @app.route('/api/stats')
 def get_stats():
     """Get pipeline statistics"""
     try:
-        csv_path = './data/weather_data.csv'
-        
-        if not os.path.exists(csv_path):
+        if not weather_data_exists():
             return jsonify({
                 'success': False,
                 'message': 'No data available'
             }), 404
-        
-        df = pd.read_csv(csv_path)
-        
-        # Convert all numpy types to Python native types for JSON serialization
-        stats = {
-            'total_records': int(len(df)),
-            'cities_count': int(df['city'].nunique()) if 'city' in df.columns else 0,
-            'countries_count': int(df['country'].nunique()) if 'country' in df.columns else 0,
-        }
-        
-        # Temperature stats
-        if 'temperature' in df.columns:
-            stats['temperature'] = {
-                'avg': float(round(df['temperature'].mean(), 1)),
-                'min': float(round(df['temperature'].min(), 1)),
-                'max': float(round(df['temperature'].max(), 1))
-            }
-        
-        # Humidity stats
-        if 'humidity' in df.columns:
-            stats['humidity'] = {
-                'avg': float(round(df['humidity'].mean(), 1)),
-                'min': float(round(df['humidity'].min(), 1)),
-                'max': float(round(df['humidity'].max(), 1))
-            }
-        
-        # Cities list
-        if 'city' in df.columns:
-            stats['cities'] = [str(city) for city in df['city'].unique().tolist()]
-        
-        return jsonify({
-            'success': True,
-            'stats': stats
-        })
-        
+
+        return cached_json_response(CACHE_KEY_STATS, build_stats_payload)
+
     except Exception as e:
         return jsonify({
             'success': False,
@@ -279,49 +799,122 @@ def get_stats():
         }), 500
 
 
+# Whitelist of allowed commands for security, mapped to the scripts
+# they execute in-process (no interpreter fork per request)
+ALLOWED_COMMANDS = {
+    'python3 view_data.py': 'view_data.py',
+    'python3 examples/analyze_data.py': 'examples/analyze_data.py',
+    'python3 examples/test_components.py': 'examples/test_components.py',
+    'python3 examples/custom_pipeline.py': 'examples/custom_pipeline.py',
+    'python3 pipeline.py': 'pipeline.py'
+}
+
+# Single worker so scripts run one at a time, like the old subprocess path
+_script_executor = ThreadPoolExecutor(max_workers=1)
+
+
+class _ThreadLocalStream:
+    """
+    Per-thread stand-in for sys.stdout/sys.stderr: writes from a thread
+    with a registered capture stream go there, everything else goes to
+    the original stream. contextlib.redirect_stdout rebinds the
+    process-global sys.stdout, so a run abandoned on timeout could
+    restore another run's buffer (or a dead one) on exit; with this
+    proxy installed once, each script thread only ever touches its own
+    thread-local slot.
+    """
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def redirect(self, stream):
+        """Capture this thread's writes into the given stream"""
+        self._local.stream = stream
+
+    def restore(self):
+        """Send this thread's writes back to the original stream"""
+        self._local.stream = None
+
+    def __getattr__(self, name):
+        stream = getattr(self._local, 'stream', None)
+        return getattr(stream if stream is not None else self._fallback, name)
+
+
+_script_stdout = _ThreadLocalStream(sys.stdout)
+_script_stderr = _ThreadLocalStream(sys.stderr)
+sys.stdout = _script_stdout
+sys.stderr = _script_stderr
+
+
+def run_script_inprocess(script_path):
+    """
+    Run a whitelisted script inside this process with its stdout and
+    stderr captured, avoiding the interpreter + import startup cost of
+    spawning a subprocess.
+
+    Args:
+        script_path: Path to the Python script
+
+    Returns:
+        Tuple of (captured output, exit code)
+    """
+    buffer = io.StringIO()
+    exit_code = 0
+    _script_stdout.redirect(buffer)
+    _script_stderr.redirect(buffer)
+    try:
+        runpy.run_path(script_path, run_name='__main__')
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            exit_code = e.code
+        elif e.code is not None:
+            print(e.code, file=buffer)
+            exit_code = 1
+    except Exception:
+        traceback.print_exc(file=buffer)
+        exit_code = 1
+    finally:
+        _script_stdout.restore()
+        _script_stderr.restore()
+    return buffer.getvalue(), exit_code
+
+
 @app.route('/api/execute', methods=['POST'])
 def execute_command():
-    """Execute a Python command and return output"""
+    """Execute a whitelisted Python script and return its output"""
+    global _script_executor
     try:
         data = request.get_json(silent=True) or {}
         command = data.get('command', '')
-        
-        # Whitelist of allowed commands for security
-        allowed_commands = [
-            'python3 view_data.py',
-            'python3 examples/analyze_data.py',
-            'python3 examples/test_components.py',
-            'python3 examples/custom_pipeline.py',
-            'python3 pipeline.py'
-        ]
-        
-        if command not in allowed_commands:
+
+        if command not in ALLOWED_COMMANDS:
             return jsonify({
                 'success': False,
                 'message': 'Command not allowed. Only whitelisted commands can be executed.'
             }), 403
-        
-        # Execute command with timeout
-        result = subprocess.run(
-            command.split(),
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=os.getcwd()
-        )
-        
-        output = result.stdout if result.stdout else result.stderr
-        
+
+        # Execute in-process with a timeout
+        future = _script_executor.submit(run_script_inprocess, ALLOWED_COMMANDS[command])
+        output, exit_code = future.result(timeout=30)
+
         return jsonify({
-            'success': result.returncode == 0,
+            'success': exit_code == 0,
             'output': output,
-            'exit_code': result.returncode
+            'exit_code': exit_code
         })
-        
-    except subprocess.TimeoutExpired:
+
+    except FutureTimeoutError:
+        # An in-process run can't be killed the way subprocess.run's
+        # timeout killed the child. Leave the wedged run to the old
+        # executor and swap in a fresh single worker, so later requests
+        # don't queue behind it and starve.
+        _script_executor.shutdown(wait=False)
+        _script_executor = ThreadPoolExecutor(max_workers=1)
         return jsonify({
             'success': False,
-            'message': 'Command execution timeout (30 seconds)'
+            'message': 'Command execution timeout (30 seconds); the run '
+                       'was abandoned and may still finish in the background'
         }), 408
     except Exception as e:
         return jsonify({
@@ -335,7 +928,11 @@ if __name__ == '__main__':
     print("Weather Data Pipeline Dashboard")
     print("=" * 60)
     print("Starting web server on http://localhost:5000")
+    print("For production use: gunicorn -k gevent -w 2 app:app")
     print("Press Ctrl+C to stop")
     print("=" * 60)
-    
-    app.run(debug=True, host='0.0.0.0', port=5000)
+
+    # Debug mode (reloader + interactive debugger) is opt-in only;
+    # production runs should go through gunicorn with gevent workers
+    debug = os.getenv('FLASK_DEBUG', '0') == '1'
+    app.run(debug=debug, host='0.0.0.0', port=5000)
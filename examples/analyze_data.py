@@ -3,6 +3,7 @@ Example: Data Analysis
 Analyze weather data stored in the pipeline
 """
 import os
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -13,9 +14,17 @@ if not os.path.exists(data_file):
     print("❌ No data file found. Run the pipeline first: python pipeline.py")
     exit(1)
 
-# Load the data
+# Load the data - only the columns the analysis uses, with explicit
+# dtypes so pandas skips type inference
 print("📊 Loading weather data...")
-df = pd.read_csv(data_file)
+df = pd.read_csv(
+    data_file,
+    usecols=['city', 'data_timestamp', 'temperature', 'humidity',
+             'wind_speed', 'weather_main'],
+    dtype={'city': 'string', 'weather_main': 'string',
+           'temperature': 'float32', 'humidity': 'float32',
+           'wind_speed': 'float32'}
+)
 
 print(f"✅ Loaded {len(df)} records\n")
 
@@ -31,24 +40,31 @@ print(f"Date Range: {df['data_timestamp'].min()} to {df['data_timestamp'].max()}
 print(f"Unique Cities: {df['city'].nunique()}")
 print(f"Cities: {', '.join(df['city'].unique())}")
 
+# Plain array views - min/max and the city at that position come from
+# one linear argmin/argmax pass instead of idxmin + label lookup
+cities = df['city'].to_numpy()
+temps = df['temperature'].to_numpy()
+humidity = df['humidity'].to_numpy()
+wind = df['wind_speed'].to_numpy()
+
 print("\n2. TEMPERATURE STATISTICS (°C)")
 print("-" * 60)
 print(f"Average: {df['temperature'].mean():.2f}")
 print(f"Median: {df['temperature'].median():.2f}")
-print(f"Min: {df['temperature'].min():.2f} ({df.loc[df['temperature'].idxmin(), 'city']})")
-print(f"Max: {df['temperature'].max():.2f} ({df.loc[df['temperature'].idxmax(), 'city']})")
+print(f"Min: {np.nanmin(temps):.2f} ({cities[np.nanargmin(temps)]})")
+print(f"Max: {np.nanmax(temps):.2f} ({cities[np.nanargmax(temps)]})")
 print(f"Std Dev: {df['temperature'].std():.2f}")
 
 print("\n3. HUMIDITY STATISTICS (%)")
 print("-" * 60)
 print(f"Average: {df['humidity'].mean():.2f}")
-print(f"Min: {df['humidity'].min():.2f} ({df.loc[df['humidity'].idxmin(), 'city']})")
-print(f"Max: {df['humidity'].max():.2f} ({df.loc[df['humidity'].idxmax(), 'city']})")
+print(f"Min: {np.nanmin(humidity):.2f} ({cities[np.nanargmin(humidity)]})")
+print(f"Max: {np.nanmax(humidity):.2f} ({cities[np.nanargmax(humidity)]})")
 
 print("\n4. WIND STATISTICS (m/s)")
 print("-" * 60)
 print(f"Average Speed: {df['wind_speed'].mean():.2f}")
-print(f"Max Speed: {df['wind_speed'].max():.2f} ({df.loc[df['wind_speed'].idxmax(), 'city']})")
+print(f"Max Speed: {np.nanmax(wind):.2f} ({cities[np.nanargmax(wind)]})")
 
 print("\n5. WEATHER CONDITIONS")
 print("-" * 60)
@@ -56,22 +72,22 @@ weather_counts = df['weather_main'].value_counts()
 for condition, count in weather_counts.items():
     print(f"{condition}: {count} ({count/len(df)*100:.1f}%)")
 
+# One grouped pass over the data covers all the per-city rankings below
+city_means = df.groupby('city')[['temperature', 'humidity']].mean()
+
 print("\n6. TOP 5 HOTTEST CITIES")
 print("-" * 60)
-hottest = df.groupby('city')['temperature'].mean().sort_values(ascending=False).head(5)
-for city, temp in hottest.items():
+for city, temp in city_means['temperature'].nlargest(5).items():
     print(f"{city}: {temp:.2f}°C")
 
 print("\n7. TOP 5 COLDEST CITIES")
 print("-" * 60)
-coldest = df.groupby('city')['temperature'].mean().sort_values().head(5)
-for city, temp in coldest.items():
+for city, temp in city_means['temperature'].nsmallest(5).items():
     print(f"{city}: {temp:.2f}°C")
 
 print("\n8. MOST HUMID CITIES")
 print("-" * 60)
-humid = df.groupby('city')['humidity'].mean().sort_values(ascending=False).head(5)
-for city, humidity in humid.items():
+for city, humidity in city_means['humidity'].nlargest(5).items():
     print(f"{city}: {humidity:.2f}%")
 
 print("\n" + "="*60)
@@ -4,10 +4,9 @@ Orchestrates the ETL process for weather data
 """
 import os
 import sys
-import yaml
+import functools
 from pathlib import Path
 from typing import Dict, List
-from dotenv import load_dotenv
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -17,19 +16,54 @@ from src.extract.weather_extractor import WeatherExtractor
 from src.transform.weather_transformer import WeatherTransformer
 from src.load.data_loader import DataLoader
 
+# .env is parsed at most once per process; re-instantiating the
+# pipeline (e.g. scheduler ticks) must not re-stat and re-parse it
+_env_loaded = False
+
+
+def load_env():
+    """Load environment variables from .env once per process"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+@functools.lru_cache(maxsize=4)
+def _parse_config(config_path: str, mtime: float) -> Dict:
+    """
+    Parse the YAML config with the C-accelerated loader, memoized on
+    (path, mtime) so repeated pipeline instantiations (e.g. scheduler
+    ticks) skip the parse unless the file actually changed. yaml is
+    imported here, not at module top, to keep cold-start lean.
+    """
+    import yaml
+    try:
+        from yaml import CSafeLoader as _YamlLoader
+    except ImportError:
+        from yaml import SafeLoader as _YamlLoader
+
+    with open(config_path, 'r') as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
 
 class WeatherPipeline:
     """Main pipeline orchestrator for weather data"""
     
-    def __init__(self, config_path: str = 'config.yaml'):
+    def __init__(self, config_path: str = 'config.yaml', persistent: bool = False):
         """
         Initialize the pipeline
-        
+
         Args:
             config_path: Path to configuration file
+            persistent: Keep the extractor's HTTP session (and its
+                        keep-alive connection pool) open across run()
+                        calls; the owner must call close() when done
         """
-        # Load environment variables
-        load_dotenv()
+        self.persistent = persistent
+        # Load environment variables (no-op after the first call)
+        load_env()
         
         # Load configuration
         self.config = self._load_config(config_path)
@@ -43,14 +77,16 @@ class WeatherPipeline:
         self.extractor = None
         self.transformer = None
         self.loader = None
+
+        # Number of records processed by the most recent run
+        self.last_record_count = 0
         
         self._initialize_components()
     
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from YAML file"""
         try:
-            with open(config_path, 'r') as f:
-                return yaml.safe_load(f)
+            return _parse_config(config_path, os.path.getmtime(config_path))
         except Exception as e:
             print(f"Error loading config: {e}")
             return {}
@@ -88,16 +124,15 @@ class WeatherPipeline:
             True if successful, False otherwise
         """
         try:
-            self.logger.info("=" * 60)
+            # One event instead of banner lines - cheaper and greppable
             self.logger.info("Starting Weather Data Pipeline")
-            self.logger.info("=" * 60)
             
             # Get cities from parameter or environment
             if not cities:
                 cities_str = os.getenv('CITIES', 'London,New York,Tokyo')
                 cities = [city.strip() for city in cities_str.split(',')]
             
-            self.logger.info(f"Fetching weather for {len(cities)} cities: {', '.join(cities)}")
+            self.logger.info("Fetching weather for %d cities: %s", len(cities), ', '.join(cities))
             
             # EXTRACT: Fetch weather data
             self.logger.info("Phase 1: Data Extraction")
@@ -125,7 +160,16 @@ class WeatherPipeline:
             success = False
             if storage_type == 'csv':
                 csv_path = self.config.get('storage', {}).get('csv_path', './data/weather_data.csv')
-                success = self.loader.load_to_csv(transformed_df, csv_path, mode='append')
+                parquet_path = self.config.get('storage', {}).get(
+                    'parquet_path', './data/weather_data.parquet')
+
+                # CSV and its Parquet mirror (the dashboard reads the
+                # columnar copy) are written concurrently
+                results = self.loader.load_all(transformed_df, [
+                    ('csv', {'file_path': csv_path, 'mode': 'append'}),
+                    ('parquet', {'file_path': parquet_path, 'mode': 'append'}),
+                ])
+                success = results.get('csv', False)
             
             elif storage_type == 'sqlite':
                 db_path = self.config.get('storage', {}).get('sqlite_path', './data/weather_data.db')
@@ -143,27 +187,35 @@ class WeatherPipeline:
                 success = self.loader.load_to_postgresql(transformed_df, conn_str)
             
             else:
-                self.logger.warning(f"Unknown storage type: {storage_type}, defaulting to CSV")
+                self.logger.warning("Unknown storage type: %s, defaulting to CSV", storage_type)
                 success = self.loader.load_to_csv(transformed_df, './data/weather_data.csv')
             
             if success:
-                self.logger.info("=" * 60)
-                self.logger.info("Pipeline completed successfully!")
-                self.logger.info(f"Processed {len(transformed_df)} weather records")
-                self.logger.info("=" * 60)
+                self.last_record_count = len(transformed_df)
+                self.logger.info("Pipeline completed successfully: %d weather records",
+                                 len(transformed_df))
                 return True
             else:
                 self.logger.error("Pipeline failed during data loading")
                 return False
                 
         except Exception as e:
-            self.logger.error(f"Pipeline failed with error: {str(e)}", exc_info=True)
+            self.logger.error("Pipeline failed with error: %s", e, exc_info=True)
             return False
         
         finally:
-            # Cleanup
-            if self.extractor:
+            # Cleanup - persistent pipelines keep their session alive
+            # so the next run reuses the pooled connections
+            if self.extractor and not self.persistent:
                 self.extractor.close()
+
+    def close(self):
+        """Release the extractor's HTTP session and the loader's cached
+        database engines (persistent pipelines)"""
+        if self.extractor:
+            self.extractor.close()
+        if self.loader:
+            self.loader.close()
     
     def run_with_stats(self, cities: List[str] = None):
         """Run pipeline and print statistics"""
@@ -181,10 +233,33 @@ class WeatherPipeline:
         if storage_type == 'csv':
             csv_path = self.config.get('storage', {}).get('csv_path', './data/weather_data.csv')
             if os.path.exists(csv_path):
-                import pandas as pd
-                df = pd.read_csv(csv_path)
-                self.logger.info(f"Total records in storage: {len(df)}")
-                self.logger.info(f"Unique cities: {df['city'].nunique() if 'city' in df.columns else 'N/A'}")
+                total, unique_cities = self._storage_counts(csv_path)
+                self.logger.info("Total records in storage: %d", total)
+                self.logger.info("Unique cities: %s", unique_cities)
+
+    @staticmethod
+    def _storage_counts(csv_path: str):
+        """
+        Count total rows and distinct cities in the stored CSV.
+
+        DuckDB streams the file and projects only the city column, so
+        memory stays O(distinct cities) however large the append-mode
+        history grows; without duckdb, fall back to a single-column
+        pandas read instead of parsing the full file.
+        """
+        try:
+            import duckdb
+            row = duckdb.connect().execute(
+                "SELECT COUNT(*), COUNT(DISTINCT city) FROM read_csv_auto(?)",
+                [csv_path]).fetchone()
+            return row[0], row[1]
+        except Exception:
+            import pandas as pd
+            try:
+                city = pd.read_csv(csv_path, usecols=['city'])['city']
+                return len(city), city.nunique()
+            except ValueError:  # no 'city' column
+                return len(pd.read_csv(csv_path)), 'N/A'
 
 
 def main():
@@ -196,9 +271,11 @@ def main():
     ╚══════════════════════════════════════════════════════╝
     """)
     
-    # Check if .env exists
-    if not os.path.exists('.env'):
-        print("⚠️  Warning: .env file not found!")
+    # Load the environment once and check for credentials directly,
+    # instead of stat-ing .env here and re-parsing it in __init__
+    load_env()
+    if not (os.getenv('RAPIDAPI_KEY') or os.getenv('WEATHER_API_KEY')):
+        print("⚠️  Warning: no API key configured!")
         print("Please create a .env file based on .env.example")
         print("You need to add your RapidAPI key for Weather API\n")
         return
@@ -3,23 +3,20 @@ Scheduled Pipeline Runner
 Runs the weather data pipeline at regular intervals
 """
 import os
-import time
-import schedule
+import threading
 from datetime import datetime
-from dotenv import load_dotenv
-from pipeline import WeatherPipeline
+from pipeline import WeatherPipeline, load_env
 
 
-def run_pipeline_job():
+def run_pipeline_job(pipeline):
     """Job to run the pipeline"""
     print(f"\n{'='*60}")
     print(f"Running scheduled pipeline at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*60}\n")
-    
+
     try:
-        pipeline = WeatherPipeline()
         success = pipeline.run()
-        
+
         if success:
             print(f"\n✅ Pipeline completed successfully at {datetime.now().strftime('%H:%M:%S')}")
         else:
@@ -31,7 +28,7 @@ def run_pipeline_job():
 
 def main():
     """Main scheduler function"""
-    load_dotenv()
+    load_env()
     
     # Get interval from environment (default: 60 minutes)
     interval = int(os.getenv('FETCH_INTERVAL_MINUTES', 60))
@@ -47,19 +44,25 @@ def main():
     print(f"⏰ Next run: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"Press Ctrl+C to stop\n")
     
-    # Schedule the job
-    schedule.every(interval).minutes.do(run_pipeline_job)
-    
+    # One pipeline for the whole scheduler lifetime - keeps the HTTPS
+    # connection pool (and TLS session) warm between ticks instead of
+    # rebuilding config, logger and session every run
+    pipeline = WeatherPipeline(persistent=True)
+
     # Run immediately on start
-    run_pipeline_job()
-    
-    # Keep running scheduled jobs
+    run_pipeline_job(pipeline)
+
+    # Keep running scheduled jobs. A single static job needs no
+    # scheduling library: Event.wait blocks in the kernel until the
+    # exact next fire time, instead of waking every 30s to poll.
+    stop_event = threading.Event()
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(30)  # Check every 30 seconds
+        while not stop_event.wait(interval * 60):
+            run_pipeline_job(pipeline)
     except KeyboardInterrupt:
         print("\n\n🛑 Scheduler stopped by user")
+    finally:
+        pipeline.close()
 
 
 if __name__ == '__main__':
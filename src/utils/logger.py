@@ -1,55 +1,88 @@
 """
 Logging utility for the data pipeline
 """
+import atexit
 import logging
 import os
+import queue
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 
 class PipelineLogger:
     """Custom logger for the data pipeline"""
-    
+
+    # Configured loggers memoized per name: re-instantiating a logger
+    # (e.g. from short-lived components) skips the mkdir/stat calls and
+    # handler setup entirely
+    _instances = {}
+
     def __init__(self, name: str, log_dir: str = "./logs", log_level: str = "INFO"):
         """
         Initialize the logger
-        
+
         Args:
             name: Logger name
             log_dir: Directory to store log files
             log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         """
         self.name = name
+        self.listener = None
+
+        cached = self._instances.get(name)
+        if cached is not None:
+            self.logger = cached
+            return
+
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
-        
+
         # Create logger
         self.logger = logging.getLogger(name)
         self.logger.setLevel(getattr(logging, log_level.upper()))
-        
+        self._instances[name] = self.logger
+
         # Prevent duplicate handlers
         if self.logger.handlers:
             return
-        
+
         # Create formatters
         formatter = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
-        
+
         # Console handler
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(formatter)
-        self.logger.addHandler(console_handler)
-        
+
         # File handler
         log_file = self.log_dir / f"{name}_{datetime.now().strftime('%Y%m%d')}.log"
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
-    
+
+        # Producers only enqueue the record and return; formatting and
+        # the write()/flush() happen on the listener's thread, off the
+        # transform/load hot paths
+        log_queue = queue.Queue(-1)
+        self.logger.addHandler(QueueHandler(log_queue))
+
+        self.listener = QueueListener(log_queue, console_handler, file_handler,
+                                      respect_handler_level=True)
+        self.listener.start()
+
+        # Drain pending records even if stop() is never called
+        atexit.register(self.stop)
+
     def get_logger(self):
         """Return the logger instance"""
         return self.logger
+
+    def stop(self):
+        """Stop the listener thread, draining queued records first"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
@@ -175,7 +175,8 @@ async function loadWeatherData() {
     weatherCards.innerHTML = '<div class="loading"><i class="fas fa-spinner fa-spin"></i> Loading weather data...</div>';
 
     try {
-        const response = await fetch('/api/data');
+        // One batched call instead of separate /api/data + /api/data/latest requests
+        const response = await fetch('/api/bootstrap');
         const result = await response.json();
 
         if (result.success) {
@@ -187,12 +188,9 @@ async function loadWeatherData() {
                 document.getElementById('citiesCount').textContent = result.summary.cities || 0;
             }
 
-            // Get latest data for each city
-            const latestResponse = await fetch('/api/data/latest');
-            const latestResult = await latestResponse.json();
-
-            if (latestResult.success && latestResult.data.length > 0) {
-                displayWeatherCards(latestResult.data);
+            // Latest data for each city
+            if (result.latest && result.latest.length > 0) {
+                displayWeatherCards(result.latest);
             } else {
                 weatherCards.innerHTML = '<div class="loading"><i class="fas fa-info-circle"></i> No weather data available. Run the pipeline first.</div>';
             }
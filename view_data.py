@@ -2,6 +2,7 @@
 View Weather Data - Quick data viewer after pipeline runs
 Run this after fetching data with: python3 pipeline.py
 """
+import numpy as np
 import pandas as pd
 import os
 
@@ -30,10 +31,16 @@ print(f"🗺️  Countries: {df['country'].nunique()}")
 print("\n" + "=" * 80)
 print("🌡️  TEMPERATURE STATISTICS (°C)")
 print("=" * 80)
+# Single argmin/argmax pass over a plain array view instead of
+# idxmin/idxmax + label-based lookups
+cities = df['city'].to_numpy()
+temps = df['temperature'].to_numpy()
+temp_min, temp_max = np.nanmin(temps), np.nanmax(temps)
+
 print(f"Average: {df['temperature'].mean():.2f}°C")
-print(f"Minimum: {df['temperature'].min():.2f}°C ({df.loc[df['temperature'].idxmin(), 'city']})")
-print(f"Maximum: {df['temperature'].max():.2f}°C ({df.loc[df['temperature'].idxmax(), 'city']})")
-print(f"Range: {df['temperature'].max() - df['temperature'].min():.2f}°C")
+print(f"Minimum: {temp_min:.2f}°C ({cities[np.nanargmin(temps)]})")
+print(f"Maximum: {temp_max:.2f}°C ({cities[np.nanargmax(temps)]})")
+print(f"Range: {temp_max - temp_min:.2f}°C")
 
 # Humidity & Wind
 print("\n" + "=" * 80)
@@ -47,13 +54,17 @@ print(f"Max Wind Gust: {df['wind_gust'].max():.2f} m/s")
 print("\n" + "=" * 80)
 print("📍 CITY-BY-CITY WEATHER")
 print("=" * 80)
-print(f"\n{'City':<15} {'Temperature':<12} {'Feels Like':<12} {'Weather':<20} {'Humidity':<10}")
-print("-" * 80)
-
-for idx, row in df.iterrows():
-    print(f"{row['city']:<15} {row['temperature']:>6.1f}°C     "
-          f"{row['feels_like']:>6.1f}°C     "
-          f"{row['weather_main']:<20} {row['humidity']:>4.0f}%")
+# Format whole columns at once and print the frame in one call
+# instead of building a Series per row with iterrows
+city_table = pd.DataFrame({
+    'City': df['city'],
+    'Temperature': df['temperature'].map('{:>6.1f}°C'.format),
+    'Feels Like': df['feels_like'].map('{:>6.1f}°C'.format),
+    'Weather': df['weather_main'],
+    'Humidity': df['humidity'].map('{:>4.0f}%'.format),
+})
+print()
+print(city_table.to_string(index=False, justify='left'))
 
 # Weather Conditions Summary
 print("\n" + "=" * 80)